@@ -291,7 +291,7 @@ class LocalSearch(AcquisitionFunctionMaximizer):
                 size=num_points)
         else:
             # initiate local search with best configurations from previous runs
-            configs_previous_runs = runhistory.get_all_configs()
+            configs_previous_runs = runhistory.get_all_configs_list()
             configs_previous_runs_sorted = self._sort_configs_by_acq_value(
                 configs_previous_runs)
             num_configs_local_search = int(min(
@@ -3,5 +3,7 @@ from ConfigSpace import ConfigurationSpace, Configuration, Constant,\
      CategoricalHyperparameter, UniformFloatHyperparameter, \
      UniformIntegerHyperparameter, InCondition
 from ConfigSpace.read_and_write import pcs, pcs_new, json
-from litebo.utils.config_space.util import convert_configurations_to_array
+from litebo.utils.config_space.util import convert_configurations_to_array, cache_configuration_hash
 from ConfigSpace.util import get_one_exchange_neighbourhood
+
+cache_configuration_hash()
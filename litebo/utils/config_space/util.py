@@ -55,3 +55,39 @@ def impute_default_values(
         configs_array[nonfinite_mask, idx] = default
 
     return configs_array
+
+
+def cache_configuration_hash():
+    """Memoize the hash of Configuration objects.
+
+    Configuration hashes its string representation, which is rebuilt from all
+    hyperparameter values on every call. Configurations are used as dict keys
+    all over the history containers, so the hash is computed once per object
+    and dropped again whenever a value is set or the object is pickled.
+    """
+    if getattr(Configuration, '_litebo_cached_hash', False):
+        return
+    configuration_hash = Configuration.__hash__
+    configuration_setitem = Configuration.__setitem__
+
+    def __hash__(self):
+        try:
+            return self.__dict__['_cached_hash']
+        except KeyError:
+            h = self.__dict__['_cached_hash'] = configuration_hash(self)
+            return h
+
+    def __setitem__(self, key, value):
+        self.__dict__.pop('_cached_hash', None)
+        configuration_setitem(self, key, value)
+
+    def __getstate__(self):
+        # str hashes differ between processes
+        state = self.__dict__.copy()
+        state.pop('_cached_hash', None)
+        return state
+
+    Configuration.__hash__ = __hash__
+    Configuration.__setitem__ = __setitem__
+    Configuration.__getstate__ = __getstate__
+    Configuration._litebo_cached_hash = True
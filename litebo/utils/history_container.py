@@ -1,6 +1,9 @@
+import os
 import sys
 import json
 import collections
+from bisect import bisect_left, bisect_right
+from itertools import islice
 from typing import List, Union
 import numpy as np
 from litebo.utils.constants import MAXINT
@@ -10,45 +13,281 @@ from litebo.utils.multi_objective import Hypervolume, get_pareto_front
 from litebo.utils.config_space.space_utils import get_config_from_dict
 from litebo.utils.visualization.plot_convergence import plot_convergence
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-Perf = collections.namedtuple(
-    'perf', ['cost', 'time', 'status', 'additional_info'])
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+class Perf(object):
+    """
+    Immutable evaluation result of a configuration.
+
+    Ordering (<, <=, >, >=) compares the cost only, while equality and hashing use
+    all fields as the former namedtuple did, so two perfs with the same cost but
+    e.g. different time satisfy a <= b and b <= a but not a == b.
+    """
+    __slots__ = ('cost', 'time', 'status', 'additional_info')
+
+    def __init__(self, cost, time, status, additional_info):
+        object.__setattr__(self, 'cost', cost)
+        object.__setattr__(self, 'time', time)
+        object.__setattr__(self, 'status', status)
+        object.__setattr__(self, 'additional_info', additional_info)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("can't set attribute of Perf")
+
+    def __delattr__(self, name):
+        raise AttributeError("can't delete attribute of Perf")
+
+    def __reduce__(self):
+        return Perf, self._astuple()
+
+    def _astuple(self):
+        return self.cost, self.time, self.status, self.additional_info
+
+    def __iter__(self):
+        return iter(self._astuple())
+
+    def __eq__(self, other):
+        if not isinstance(other, Perf):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+    def __repr__(self):
+        return 'Perf(cost=%r, time=%r, status=%r, additional_info=%r)' % self._astuple()
+
+    def __lt__(self, other):
+        return self.cost < getattr(other, 'cost', other)
+
+    def __le__(self, other):
+        return self.cost <= getattr(other, 'cost', other)
+
+    def __gt__(self, other):
+        return self.cost > getattr(other, 'cost', other)
+
+    def __ge__(self, other):
+        return self.cost >= getattr(other, 'cost', other)
+
+
+def _compute_hv_2d(Y: np.ndarray, ref_point: np.ndarray):
+    """
+    Compute the hypervolume of 2-objective points by sweeping along the first objective.
+
+    Note: this assumes minimization.
+    """
+    Y = Y[np.all(Y <= ref_point, axis=1)]
+    if Y.shape[0] == 0:
+        return 0.0
+    Y = Y[np.argsort(Y[:, 0], kind='stable')]
+    widths = np.diff(np.append(Y[:, 0], ref_point[0]))
+    heights = ref_point[1] - np.minimum.accumulate(Y[:, 1])
+    return float(np.sum(widths * heights))
+
+
+def _dominance_update(pareto_arr, new_perf, keep_mask):
+    """
+    Check a new point against the pareto front in one pass: set keep_mask[i] to False for the
+    pareto points dominated by it, and return whether it is (weakly) dominated by the front.
+
+    Note: this assumes minimization. Compiled with numba if it is installed.
+    """
+    n, m = pareto_arr.shape
+    for i in range(n):
+        # track both directions in a single walk, and stop once the points are incomparable
+        all_le = True
+        all_ge = True
+        for j in range(m):
+            all_le &= pareto_arr[i, j] <= new_perf[j]
+            all_ge &= pareto_arr[i, j] >= new_perf[j]
+            if not (all_le or all_ge):
+                break
+        if all_le:
+            return True
+        keep_mask[i] = not all_ge
+    return False
+
+
+if njit is not None:
+    _dominance_update = njit(cache=True)(_dominance_update)
+
+
+def _all_finite(perfs) -> bool:
+    # only the perfs may hold inf or nan, so the config dicts are not scanned
+    return bool(np.isfinite(np.asarray(perfs, dtype=np.float64)).all())
+
+
+def _dumps_json(obj, indent=True, finite=True) -> bytes:
+    # orjson writes inf and nan as null, so data with non-finite perfs (finite=False) goes
+    # through the json module, which writes Infinity/NaN like the files saved without orjson.
+    if orjson is not None and finite:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+def _loads_json(s: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # orjson rejects Infinity/NaN
+            pass
+    return json.loads(s)
+
+
+def _read_json_history(fn: str, logger):
+    """
+    Read the runs saved in fn and in its incremental log fn + ".log", if any.
+
+    A last log line that does not parse, as left by a crash while appending, is skipped.
+    """
+    data = list()
+    log_fn = fn + ".log"
+    if os.path.exists(fn) or not os.path.exists(log_fn):
+        with open(fn, "rb") as fp:
+            data.extend(_loads_json(fp.read())["data"])
+    if os.path.exists(log_fn):
+        with open(log_fn, "rb") as fp:
+            lines = [line for line in fp.read().splitlines() if line.strip()]
+        for i, line in enumerate(lines):
+            try:
+                data.append(_loads_json(line))
+            except ValueError:
+                if i < len(lines) - 1:
+                    raise
+                logger.warning('Skipping the truncated last line of %s.', log_fn)
+    return data
+
+
+def _repair_log_tail(log_fn: str, logger):
+    """
+    Make log_fn end with a complete line before appending to it: a last line without a newline,
+    left by a crash while appending, is completed if it parses and cut off otherwise.
+    """
+    if not os.path.exists(log_fn):
+        return
+    with open(log_fn, "r+b") as fp:
+        end = fp.seek(0, os.SEEK_END)
+        # find where the last line starts, reading backwards block by block
+        start = end
+        while start > 0:
+            block_start = max(0, start - 4096)
+            fp.seek(block_start)
+            idx = fp.read(start - block_start).rfind(b"\n")
+            if idx >= 0:
+                start = block_start + idx + 1
+                break
+            start = block_start
+        if start == end:
+            return
+        fp.seek(start)
+        try:
+            _loads_json(fp.read())
+        except ValueError:
+            logger.warning('Dropping the truncated last line of %s.', log_fn)
+            fp.truncate(start)
+        else:
+            fp.write(b"\n")
 
 
 class HistoryContainer(object):
     def __init__(self, task_id):
         self.task_id = task_id
         self.data = collections.OrderedDict()
+        self._serialized_cache = dict()
+        # number of runs already appended to the log of each file by save_json_incremental
+        self._n_incremental_saved = dict()
         self.config_counter = 0
         self.incumbent_value = MAXINT
         self.incumbents = list()
-        self.logger = get_logger(self.__class__.__name__)
+        self._logger = None
 
-    def add(self, config: Configuration, perf: Perf):
-        if config in self.data:
-            self.logger.warning('Repeated configuration detected!')
-            return
+    @property
+    def logger(self):
+        # created on first use, so building many containers does not touch the logger registry
+        if getattr(self, '_logger', None) is None:
+            self._logger = get_logger(self.__class__.__name__)
+        return self._logger
 
-        self.data[config] = perf
+    def _add_new_observation(self, config: Configuration, perf: Perf):
+        """
+        Insert the observation if config is not in the history yet. Returns whether it was inserted.
+        """
+        # setdefault hashes the config only once and never overwrites a recorded perf
+        n_data = len(self.data)
+        self.data.setdefault(config, perf)
+        if len(self.data) == n_data:
+            self.logger.warning('Repeated configuration detected!')
+            return False
+        self._serialized_cache[config] = config.get_dictionary()
         self.config_counter += 1
+        return True
+
+    def add(self, config: Configuration, perf: Perf):
+        if not self._add_new_observation(config, perf):
+            return
 
-        if len(self.incumbents) > 0:
+        if len(self.incumbents) == 0 or perf <= self.incumbent_value:
             if perf < self.incumbent_value:
                 self.incumbents.clear()
-            if perf <= self.incumbent_value:
-                self.incumbents.append((config, perf))
-                self.incumbent_value = perf
-        else:
-            self.incumbent_value = perf
             self.incumbents.append((config, perf))
+            self.incumbent_value = perf
+
+    def _add_new_data(self, configs: List[Configuration], perfs: List[Perf]):
+        """
+        Insert the observations of configs not in the history yet, and return them.
+        """
+        new_configs, new_perfs = list(), list()
+        for config, perf in zip(configs, perfs):
+            if self._add_new_observation(config, perf):
+                new_configs.append(config)
+                new_perfs.append(perf)
+        return new_configs, new_perfs
+
+    def add_batch(self, configs: List[Configuration], perfs: List[Perf]):
+        """
+        Add a batch of observations, e.g. to warm start from history,
+        updating the incumbents once for the whole batch.
+        """
+        new_configs, new_perfs = self._add_new_data(configs, perfs)
+        if not new_configs:
+            return
+
+        best_perf = min(new_perfs)
+        if len(self.incumbents) == 0 or best_perf <= self.incumbent_value:
+            if best_perf < self.incumbent_value:
+                self.incumbents.clear()
+            self.incumbents.extend((config, perf) for config, perf in zip(new_configs, new_perfs)
+                                   if perf <= best_perf)
+            self.incumbent_value = best_perf
 
     def get_perf(self, config: Configuration):
         return self.data[config]
 
     def get_all_perfs(self):
-        return list(self.data.values())
+        # read-only view, use get_all_perfs_list for a list copy
+        return self.data.values()
 
     def get_all_configs(self):
+        # read-only view, use get_all_configs_list for a list copy
+        return self.data.keys()
+
+    def get_all_perfs_list(self):
+        return list(self.data.values())
+
+    def get_all_configs_list(self):
         return list(self.data.keys())
 
     def empty(self):
@@ -185,37 +424,98 @@ class HistoryContainer(object):
         fn : str
             file name
         """
-        data = [(k.get_dictionary(), float(v)) for k, v in self.data.items()]
+        # config dicts are built once in add, instead of on every save
+        data = [(self._serialized_cache[k], self._encode_perf(v)) for k, v in self.data.items()]
+
+        # serialize in memory and write the file in one go
+        data_bytes = _dumps_json({"data": data}, finite=_all_finite([v for _, v in data]))
+        with open(fn, "wb", buffering=1 << 20) as fp:
+            fp.write(data_bytes)
+        # fn now holds every run, so an incremental log next to it is obsolete
+        if os.path.exists(fn + ".log"):
+            os.remove(fn + ".log")
+        self._n_incremental_saved[os.path.abspath(fn)] = len(self.data)
+
+    def save_json_incremental(self, fn: str = "history_container.json"):
+        """
+        appends the runs added since the last save of fn to the log file fn + ".log",
+        one json line per run. Use compact to merge the log into fn.
 
-        with open(fn, "w") as fp:
-            json.dump({"data": data}, fp, indent=2)
+        Parameters
+        ----------
+        fn : str
+            file name
+        """
+        key = os.path.abspath(fn)
+        new_items = [(self._serialized_cache[k], self._encode_perf(v))
+                     for k, v in islice(self.data.items(), self._n_incremental_saved.get(key, 0), None)]
+        finite = _all_finite([v for _, v in new_items])
+        lines = [_dumps_json(item, indent=False, finite=finite) + b"\n" for item in new_items]
+        _repair_log_tail(fn + ".log", self.logger)
+        with open(fn + ".log", "ab", buffering=1 << 20) as fp:
+            fp.write(b"".join(lines))
+        self._n_incremental_saved[key] = len(self.data)
+
+    def compact(self, fn: str = "history_container.json"):
+        """
+        merges the log file written by save_json_incremental into fn,
+        dropping repeated records of the same config
 
-    def load_history_from_json(self, cs: ConfigurationSpace, fn: str = "history_container.json"):
+        Parameters
+        ----------
+        fn : str
+            file name
+        """
+        # keep the first record of each config
+        data, seen = list(), set()
+        for k, v in _read_json_history(fn, self.logger):
+            key = tuple(sorted(k.items()))
+            if key not in seen:
+                seen.add(key)
+                data.append((k, v))
+        data_bytes = _dumps_json({"data": data}, finite=_all_finite([v for _, v in data]))
+        with open(fn, "wb", buffering=1 << 20) as fp:
+            fp.write(data_bytes)
+        if os.path.exists(fn + ".log"):
+            os.remove(fn + ".log")
+
+    def load_history_from_json(self, cs: ConfigurationSpace, fn: str = "history_container.json",
+                               add_to_history: bool = False):
         """Load and runhistory in json representation from disk.
+        Runs appended by save_json_incremental to fn + ".log" are loaded as well.
         Parameters
         ----------
         fn : str
             file name to load from
         cs : ConfigSpace
             instance of configuration space
+        add_to_history : bool
+            whether to also add the loaded runs to this container with add_batch,
+            which rebuilds the incumbents (and the pareto set and hypervolume) in bulk
         """
         try:
-            with open(fn) as fp:
-                all_data = json.load(fp)
+            all_data = {"data": _read_json_history(fn, self.logger)}
+            _history_data = collections.OrderedDict()
+            for k, v in all_data["data"]:
+                config = get_config_from_dict(k, cs)
+                perf = self._decode_perf(v)
+                _history_data[config] = perf
         except Exception as e:
             self.logger.warning(
                 'Encountered exception %s while reading runhistory from %s. '
                 'Not adding any runs!', e, fn,
             )
             return
-        _history_data = collections.OrderedDict()
-        # important to use add method to use all data structure correctly
-        for k, v in all_data["data"]:
-            config = get_config_from_dict(k, cs)
-            perf = float(v)
-            _history_data[config] = perf
+        if add_to_history and _history_data:
+            self.add_batch(list(_history_data.keys()), list(_history_data.values()))
         return _history_data
 
+    def _encode_perf(self, perf):
+        return float(perf)
+
+    def _decode_perf(self, perf):
+        return float(perf)
+
 
 class MOHistoryContainer(HistoryContainer):
     """
@@ -224,65 +524,219 @@ class MOHistoryContainer(HistoryContainer):
     def __init__(self, task_id, ref_point=None):
         self.task_id = task_id
         self.data = collections.OrderedDict()
+        self._serialized_cache = dict()
+        # number of runs already appended to the log of each file by save_json_incremental
+        self._n_incremental_saved = dict()
         self.config_counter = 0
-        self.pareto = collections.OrderedDict()
+        # pareto set in SoA layout: self._pareto_perfs[i] is the perf of self._pareto_configs[i]
+        self._pareto_configs = tuple()
+        self._pareto_perfs = np.empty((0, 0), dtype=np.float64)
+        self._pareto_x = list()
+        self._pareto_y = list()
         self.num_objs = None
         self.mo_incumbent_value = None
         self.mo_incumbents = None
         self.ref_point = ref_point
         self.hv_data = list()
-        self.logger = get_logger(self.__class__.__name__)
+        self._hv = Hypervolume(ref_point=ref_point) if ref_point is not None else None
+        self._last_hv = 0.0
+        # bumped whenever the pareto set changes, to validate self._hv_cache
+        self._pareto_version = 0
+        self._hv_cache = None
+        self._logger = None
+
+    def _setup_objectives(self, num_objs):
+        self.num_objs = num_objs
+        self.mo_incumbent_value = [MAXINT] * self.num_objs
+        self.mo_incumbents = [list() for _ in range(self.num_objs)]
+        self._pareto_perfs = np.empty((0, self.num_objs), dtype=np.float64)
 
     def add(self, config: Configuration, perf: List[Perf]):
         if self.num_objs is None:
-            self.num_objs = len(perf)
-            self.mo_incumbent_value = [MAXINT] * self.num_objs
-            self.mo_incumbents = [list()] * self.num_objs
+            self._setup_objectives(len(perf))
 
         assert self.num_objs == len(perf)
 
-        if config in self.data:
-            self.logger.warning('Repeated configuration detected!')
+        if not self._add_new_observation(config, perf):
             return
 
-        self.data[config] = perf
-        self.config_counter += 1
-
         # update pareto
-        remove_config = []
-        for pareto_config, pareto_perf in self.pareto.items():  # todo efficient way?
-            if all(pp <= p for pp, p in zip(pareto_perf, perf)):
-                break
-            elif all(p <= pp for pp, p in zip(pareto_perf, perf)):
-                remove_config.append(pareto_config)
+        perf_arr = np.asarray(perf, dtype=np.float64)
+        if self.num_objs == 2:
+            pareto_changed = self._update_pareto_2d(config, perf, perf_arr)
+        else:
+            pareto_changed = self._update_pareto(config, perf, perf_arr)
+        if pareto_changed:
+            self._pareto_version += 1
+
+        # update mo_incumbents
+        if len(self.mo_incumbents[0]) > 0:
+            mo_incumbent_value = np.asarray(self.mo_incumbent_value)
+            update_mask = perf_arr <= mo_incumbent_value
+            clear_mask = perf_arr < mo_incumbent_value
+        else:
+            update_mask = clear_mask = np.ones(self.num_objs, dtype=bool)
+        for i in np.flatnonzero(update_mask):
+            if clear_mask[i]:
+                self.mo_incumbents[i].clear()
+            self.mo_incumbents[i].append((config, perf[i], perf))
+            self.mo_incumbent_value[i] = perf[i]
+
+        # Calculate current hypervolume if reference point is provided
+        # The hypervolume only changes when the pareto front changes. In the 2-objective case,
+        # it has already been updated incrementally in _update_pareto_2d.
+        if self.ref_point is not None:
+            if pareto_changed and self.num_objs != 2:
+                self._last_hv = self._hv.compute(self._pareto_perfs)
+            self.hv_data.append(self._last_hv)
+
+    def _update_pareto(self, config: Configuration, perf: List[Perf], perf_arr: np.ndarray):
+        """
+        Update the pareto set with a new observation. Returns whether the pareto set changed.
+
+        self._pareto_perfs and self._pareto_configs hold the pareto perfs and configs row by row,
+        so dominance is checked in one pass, by the numba kernel if available and there are
+        at least 3 objectives, or with numpy.
+        """
+        if njit is not None and self.num_objs >= 3:
+            keep_mask = np.ones(self._pareto_perfs.shape[0], dtype=np.bool_)
+            if _dominance_update(self._pareto_perfs, perf_arr, keep_mask):
+                return False
+            dominated_by_new = ~keep_mask
         else:
-            self.pareto[config] = perf
-            self.logger.info('Update pareto: config=%s, objs=%s.' % (str(config), str(perf)))
+            dominates_new = np.all(self._pareto_perfs <= perf_arr, axis=1).any()
+            if dominates_new:
+                return False
+            # no pareto point equals perf here, so >= on every objective means dominated
+            dominated_by_new = np.all(self._pareto_perfs >= perf_arr, axis=1)
+
+        self.logger.info('Update pareto: config=%s, objs=%s.', config, perf)
+
+        pareto_configs = self._pareto_configs
+        if dominated_by_new.any():
+            for idx in np.flatnonzero(dominated_by_new):
+                conf = pareto_configs[idx]
+                self.logger.info('Remove from pareto: config=%s, objs=%s.', conf, self.data[conf])
+            keep_mask = ~dominated_by_new
+            pareto_configs = tuple(conf for conf, keep in zip(pareto_configs, keep_mask.tolist()) if keep)
+            self._pareto_perfs = self._pareto_perfs[keep_mask]
+        self._pareto_configs = pareto_configs + (config,)
+        self._pareto_perfs = np.concatenate([self._pareto_perfs, perf_arr[np.newaxis]], axis=0)
+        return True
+
+    def _update_pareto_2d(self, config: Configuration, perf: List[Perf], perf_arr: np.ndarray):
+        """
+        Update the 2-objective pareto set with a new observation. Returns whether the pareto set changed.
+
+        The front is kept sorted by the first objective (self._pareto_x), so the second objective
+        (self._pareto_y) is decreasing along it and dominance is checked by bisection.
+        """
+        x, y = perf_arr.tolist()
+        xs, ys = self._pareto_x, self._pareto_y
+        # the point with the largest x <= new x has the smallest y among the points that may dominate it
+        hi = bisect_right(xs, x)
+        if hi > 0 and ys[hi - 1] <= y:
+            return False
+
+        # the points dominated by the new one form a run starting from its insertion position
+        lo = bisect_left(xs, x)
+        end = lo
+        while end < len(ys) and ys[end] >= y:
+            end += 1
+        if self.ref_point is not None:
+            self._last_hv += self._get_hv_improvement_2d(x, y, lo, end)
 
-        for conf in remove_config:
-            self.logger.info('Remove from pareto: config=%s, objs=%s.' % (str(conf), str(self.pareto[conf])))
-            self.pareto.pop(conf)
+        self.logger.info('Update pareto: config=%s, objs=%s.', config, perf)
+
+        for conf in self._pareto_configs[lo:end]:
+            self.logger.info('Remove from pareto: config=%s, objs=%s.', conf, self.data[conf])
+        xs[lo:end] = [x]
+        ys[lo:end] = [y]
+        self._pareto_configs = self._pareto_configs[:lo] + (config,) + self._pareto_configs[end:]
+        self._pareto_perfs = np.concatenate(
+            [self._pareto_perfs[:lo], perf_arr[np.newaxis], self._pareto_perfs[end:]], axis=0)
+        return True
+
+    def _get_hv_improvement_2d(self, x, y, lo, end):
+        """
+        Hypervolume gained by adding a non-dominated point (x, y) to the 2-objective pareto front:
+        the volume of its box minus the part of the box already covered by the current front.
+        [lo, end) is the run of pareto points dominated by (x, y).
+        """
+        ref_x, ref_y = self.ref_point
+        if x >= ref_x or y >= ref_y:
+            return 0.0
+        # Apart from the dominated points, only the nearest pareto point on each side overlaps the box.
+        overlap = list(zip(self._pareto_x[lo:end], self._pareto_y[lo:end]))
+        if lo > 0:
+            overlap.insert(0, (x, self._pareto_y[lo - 1]))
+        if end < len(self._pareto_x):
+            overlap.append((self._pareto_x[end], y))
+        box = (ref_x - x) * (ref_y - y)
+        if not overlap:
+            return box
+        return box - _compute_hv_2d(np.asarray(overlap), np.asarray(self.ref_point, dtype=np.float64))
+
+    def add_batch(self, configs: List[Configuration], perfs: List[List[Perf]]):
+        """
+        Add a batch of observations, e.g. to warm start from history, updating the pareto set
+        in one vectorized pass over the current pareto front and the new perfs.
+
+        Unlike add, hv_data gets a single entry for the whole batch.
+        """
+        if len(perfs) == 0:
+            return
+        # check the batch before inserting anything, as add does
+        Y = np.asarray(perfs, dtype=np.float64)
+        assert Y.ndim == 2 and Y.shape[0] == len(configs)
+        if self.num_objs is None:
+            self._setup_objectives(Y.shape[1])
+        assert Y.shape[1] == self.num_objs
+
+        new_configs, new_perfs = self._add_new_data(configs, perfs)
+        if not new_configs:
+            return
+        Y = np.asarray(new_perfs, dtype=np.float64)
+
+        # update pareto
+        # get_pareto_front keeps the first of equal points, so old pareto points win ties as in add.
+        candidates = self._pareto_configs + tuple(new_configs)
+        candidate_arr = np.vstack([self._pareto_perfs, Y])
+        pareto_idx = get_pareto_front(candidate_arr)
+        pareto_changed = np.any(pareto_idx >= self._pareto_perfs.shape[0])
+        if pareto_changed:
+            self._pareto_version += 1
+        if self.num_objs == 2:
+            pareto_idx = pareto_idx[np.argsort(candidate_arr[pareto_idx, 0], kind='stable')]
+        self._pareto_configs = tuple(candidates[idx] for idx in pareto_idx)
+        self._pareto_perfs = candidate_arr[pareto_idx]
+        if self.num_objs == 2:
+            self._pareto_x = self._pareto_perfs[:, 0].tolist()
+            self._pareto_y = self._pareto_perfs[:, 1].tolist()
 
         # update mo_incumbents
+        is_empty = len(self.mo_incumbents[0]) == 0
         for i in range(self.num_objs):
-            if len(self.mo_incumbents[i]) > 0:
-                if perf[i] < self.mo_incumbent_value[i]:
-                    self.mo_incumbents[i].clear()
-                if perf[i] <= self.mo_incumbent_value[i]:
-                    self.mo_incumbents[i].append((config, perf[i], perf))
-                    self.mo_incumbent_value[i] = perf[i]
-            else:
-                self.mo_incumbent_value[i] = perf[i]
-                self.mo_incumbents[i].append((config, perf[i], perf))
+            best_value = Y[:, i].min()
+            if not is_empty and best_value > self.mo_incumbent_value[i]:
+                continue
+            if is_empty or best_value < self.mo_incumbent_value[i]:
+                self.mo_incumbents[i].clear()
+            best_idx = np.flatnonzero(Y[:, i] == best_value)
+            for idx in best_idx:
+                self.mo_incumbents[i].append((new_configs[idx], new_perfs[idx][i], new_perfs[idx]))
+            self.mo_incumbent_value[i] = new_perfs[best_idx[0]][i]
 
-        # Calculate current hypervolume if reference point is provided
         if self.ref_point is not None:
-            pareto_front = self.get_pareto_front()
-            if pareto_front:
-                hv = Hypervolume(ref_point=self.ref_point).compute(pareto_front)
-            else:
-                hv = 0
-            self.hv_data.append(hv)
+            if pareto_changed:
+                self._last_hv = self._hv.compute(self._pareto_perfs)
+            self.hv_data.append(self._last_hv)
+
+    def _encode_perf(self, perf):
+        return [float(p) for p in perf]
+
+    def _decode_perf(self, perf):
+        return [float(p) for p in perf]
 
     def get_incumbents(self):
         return self.get_pareto()
@@ -293,24 +747,37 @@ class MOHistoryContainer(HistoryContainer):
     def get_mo_incumbent_value(self):
         return self.mo_incumbent_value
 
+    @property
+    def pareto(self):
+        # read-only: a new snapshot of the pareto set on each access, so writes to it are not kept
+        return collections.OrderedDict(self.get_pareto())
+
     def get_pareto(self):
-        return list(self.pareto.items())
+        return list(zip(self._pareto_configs, self.get_pareto_front()))
 
     def get_pareto_set(self):
-        return list(self.pareto.keys())
+        # the stored tuple itself: no copy is made, and callers cannot modify it
+        return self._pareto_configs
 
     def get_pareto_front(self):
-        return list(self.pareto.values())
+        return self._pareto_perfs.tolist()
 
     def compute_hypervolume(self, ref_point=None):
         if ref_point is None:
             ref_point = self.ref_point
         assert ref_point is not None
-        pareto_front = self.get_pareto_front()
-        if pareto_front:
-            hv = Hypervolume(ref_point=ref_point).compute(pareto_front)
+        # The hypervolume w.r.t. self.ref_point is kept up to date in add.
+        if self.ref_point is not None and np.array_equal(ref_point, self.ref_point):
+            return self._last_hv
+        # For other reference points, reuse the last result while the pareto set is unchanged.
+        ref_key = tuple(np.asarray(ref_point, dtype=np.float64).tolist())
+        if self._hv_cache is not None and self._hv_cache[:2] == (ref_key, self._pareto_version):
+            return self._hv_cache[2]
+        if self._pareto_perfs.shape[0] > 0:
+            hv = Hypervolume(ref_point=ref_point).compute(self._pareto_perfs)
         else:
             hv = 0
+        self._hv_cache = (ref_key, self._pareto_version, hv)
         return hv
 
 
@@ -361,6 +828,9 @@ class MultiStartHistoryContainer(object):
     def add(self, config: Configuration, perf: Perf):
         self.current.add(config, perf)
 
+    def add_batch(self, configs: List[Configuration], perfs: List[Perf]):
+        self.current.add_batch(configs, perfs)
+
     def get_perf(self, config: Configuration):
         for history_container in self.history_containers:
             if config in history_container.data:
@@ -370,6 +840,9 @@ class MultiStartHistoryContainer(object):
     def get_all_configs(self):
         return self.current.get_all_configs()
 
+    def get_all_configs_list(self):
+        return self.current.get_all_configs_list()
+
     def empty(self):
         return self.current.config_counter == 0
 
@@ -377,7 +850,7 @@ class MultiStartHistoryContainer(object):
         if self.num_objs == 1:
             return self.current.incumbents
         else:
-            return self.current.get_pareto()
+            return self.current.get_incumbents()
 
     def get_mo_incumbents(self):
         assert self.num_objs > 1
@@ -410,7 +883,31 @@ class MultiStartHistoryContainer(object):
         """
         self.current.save_json(fn)
 
-    def load_history_from_json(self, cs: ConfigurationSpace, fn: str = "history_container.json"):
+    def save_json_incremental(self, fn: str = "history_container.json"):
+        """
+        appends the new runs to the log file fn + ".log"
+
+        Parameters
+        ----------
+        fn : str
+            file name
+        """
+        self.current.save_json_incremental(fn)
+
+    def compact(self, fn: str = "history_container.json"):
+        """
+        merges the log file written by save_json_incremental into fn,
+        dropping repeated records of the same config
+
+        Parameters
+        ----------
+        fn : str
+            file name
+        """
+        self.current.compact(fn)
+
+    def load_history_from_json(self, cs: ConfigurationSpace, fn: str = "history_container.json",
+                               add_to_history: bool = False):
         """Load and runhistory in json representation from disk.
         Parameters
         ----------
@@ -418,5 +915,7 @@ class MultiStartHistoryContainer(object):
             file name to load from
         cs : ConfigSpace
             instance of configuration space
+        add_to_history : bool
+            whether to also add the loaded runs to the current container
         """
-        self.current.load_history_from_json(cs, fn)
+        return self.current.load_history_from_json(cs, fn, add_to_history=add_to_history)
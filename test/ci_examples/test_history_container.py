@@ -0,0 +1,204 @@
+import os
+import logging
+import tempfile
+import numpy as np
+
+from litebo.utils.config_space import ConfigurationSpace, UniformFloatHyperparameter
+from litebo.utils.history_container import MOHistoryContainer
+from litebo.utils.multi_objective import Hypervolume
+
+logging.disable(logging.WARNING)
+
+
+class ReferenceMOHistory(object):
+    """
+    Straightforward re-implementation of the original MOHistoryContainer.add:
+    pareto update by a loop over the front, hypervolume recomputed from scratch.
+    """
+    def __init__(self, ref_point):
+        self.ref_point = ref_point
+        self.data = dict()
+        self.pareto = dict()
+        self.mo_incumbents = None
+        self.mo_incumbent_value = None
+        self.hv_data = list()
+
+    def add(self, config, perf):
+        if self.mo_incumbents is None:
+            self.mo_incumbent_value = [float('inf')] * len(perf)
+            self.mo_incumbents = [list() for _ in perf]
+        if config in self.data:
+            return
+        self.data[config] = perf
+
+        remove_config = []
+        for pareto_config, pareto_perf in self.pareto.items():
+            if all(pp <= p for pp, p in zip(pareto_perf, perf)):
+                break
+            elif all(p <= pp for pp, p in zip(pareto_perf, perf)):
+                remove_config.append(pareto_config)
+        else:
+            self.pareto[config] = perf
+        for conf in remove_config:
+            self.pareto.pop(conf)
+
+        for i in range(len(perf)):
+            if perf[i] < self.mo_incumbent_value[i]:
+                self.mo_incumbents[i].clear()
+            if perf[i] <= self.mo_incumbent_value[i]:
+                self.mo_incumbents[i].append((config, perf[i], perf))
+                self.mo_incumbent_value[i] = perf[i]
+
+        pareto_front = list(self.pareto.values())
+        hv = Hypervolume(ref_point=self.ref_point).compute(pareto_front) if pareto_front else 0
+        self.hv_data.append(hv)
+
+
+def get_observations(num_objs, n=150, seed=1):
+    """
+    Random perfs scattered around the simplex sum(perf) = 1, so that the pareto front holds
+    many points, with some beyond ref_point = [1] * num_objs and many ties from rounding
+    half of them to one decimal.
+    """
+    cs = ConfigurationSpace()
+    cs.add_hyperparameter(UniformFloatHyperparameter('x', 0, 1))
+    cs.seed(seed)
+    configs = cs.sample_configuration(n)
+    rng = np.random.RandomState(seed)
+    perfs = rng.rand(n, num_objs)
+    perfs = perfs / perfs.sum(axis=1, keepdims=True) * rng.uniform(0.9, 1.5, size=(n, 1))
+    rounded = rng.rand(n) < 0.5
+    perfs[rounded] = np.round(perfs[rounded], 1)
+    return configs, perfs.tolist()
+
+
+def check_same_state(history, reference):
+    assert set(history.get_pareto_set()) == set(reference.pareto)
+    assert sorted(history.get_pareto_front()) == sorted(reference.pareto.values())
+    assert history.mo_incumbents == reference.mo_incumbents
+    assert history.mo_incumbent_value == reference.mo_incumbent_value
+
+
+def test_pareto_and_incumbents():
+    for num_objs in [2, 3]:
+        configs, perfs = get_observations(num_objs, seed=2)
+        history = MOHistoryContainer('test', ref_point=[1.0] * num_objs)
+        reference = ReferenceMOHistory([1.0] * num_objs)
+        for config, perf in zip(configs, perfs):
+            history.add(config, perf)
+            reference.add(config, perf)
+            check_same_state(history, reference)
+        # repeated configurations are ignored
+        history.add(configs[0], [0.0] * num_objs)
+        check_same_state(history, reference)
+        if num_objs == 2:
+            # the 2-D front is kept sorted by the first objective
+            front = history.get_pareto_front()
+            assert front == sorted(front)
+
+
+def test_incremental_hypervolume():
+    for num_objs in [2, 3]:
+        ref_point = [1.0] * num_objs
+        configs, perfs = get_observations(num_objs)
+        history = MOHistoryContainer('test', ref_point=ref_point)
+        reference = ReferenceMOHistory(ref_point)
+        for config, perf in zip(configs, perfs):
+            history.add(config, perf)
+            reference.add(config, perf)
+        assert np.allclose(history.hv_data, reference.hv_data)
+        assert np.isclose(history.compute_hypervolume(), reference.hv_data[-1])
+        assert np.isclose(history.compute_hypervolume([1.1] * num_objs),
+                          Hypervolume([1.1] * num_objs).compute(list(reference.pareto.values())))
+
+
+def test_add_batch():
+    for num_objs in [2, 3]:
+        ref_point = [1.0] * num_objs
+        configs, perfs = get_observations(num_objs, seed=3)
+        history = MOHistoryContainer('test', ref_point=ref_point)
+        reference = ReferenceMOHistory(ref_point)
+        start = 0
+        for i, size in enumerate([1, 30, 5, 1, 50, 63]):
+            batch_configs, batch_perfs = configs[start:start + size], perfs[start:start + size]
+            for config, perf in zip(batch_configs, batch_perfs):
+                reference.add(config, perf)
+            if i % 2 == 0:
+                for config, perf in zip(batch_configs, batch_perfs):
+                    history.add(config, perf)
+            else:
+                # repeated configurations, in the history or within the batch, are ignored
+                history.add_batch(batch_configs + [batch_configs[0], configs[0]],
+                                  batch_perfs + [[0.0] * num_objs, [0.0] * num_objs])
+            check_same_state(history, reference)
+            # add_batch appends a single hv_data entry for the whole batch
+            assert np.isclose(history.hv_data[-1], reference.hv_data[-1])
+            start += size
+        assert start == len(configs)
+        assert len(history.data) == len(reference.data)
+        # a batch of the wrong width is rejected before anything is inserted
+        new_configs, _ = get_observations(num_objs, n=2, seed=5)
+        try:
+            history.add_batch(new_configs, [[0.5] * (num_objs + 1)] * 2)
+        except AssertionError:
+            pass
+        else:
+            raise AssertionError('add_batch accepted perfs of the wrong width')
+        assert len(history.data) == history.config_counter == len(reference.data)
+
+
+def test_save_and_load_json():
+    cs = ConfigurationSpace()
+    cs.add_hyperparameter(UniformFloatHyperparameter('x', 0, 1))
+    configs, perfs = get_observations(2, n=11, seed=4)
+    tmp_dir = tempfile.mkdtemp()
+    fn = os.path.join(tmp_dir, 'ckpt.json')
+    snapshot_fn = os.path.join(tmp_dir, 'snapshot.json')
+
+    def check_loaded(fn, n):
+        data = MOHistoryContainer('test').load_history_from_json(cs, fn)
+        assert list(data.keys()) == configs[:n]
+        assert list(data.values()) == perfs[:n]
+
+    history = MOHistoryContainer('test', ref_point=[1.0, 1.0])
+    for i in range(11):
+        history.add(configs[i], perfs[i])
+        # saving another file does not move the position in the log of fn
+        if i == 2:
+            history.save_json_incremental(fn)
+        elif i == 4:
+            history.save_json(snapshot_fn)
+        elif i == 7:
+            history.save_json_incremental(fn)
+            check_loaded(fn, 8)
+            # fn holds every run after save_json, and its log is removed
+            history.save_json(fn)
+            assert not os.path.exists(fn + '.log')
+            check_loaded(fn, 8)
+        elif i == 8:
+            history.save_json_incremental(fn)
+            # a crash while appending leaves a truncated last line, which is skipped
+            with open(fn + '.log', 'a') as fp:
+                fp.write('[{"x": 0.12')
+            check_loaded(fn, 9)
+    check_loaded(snapshot_fn, 5)
+    # the truncated line is dropped before appending
+    history.save_json_incremental(fn)
+    check_loaded(fn, 11)
+
+    # a new container logs every run again, and compact drops the repeated records
+    loaded = MOHistoryContainer('test', ref_point=[1.0, 1.0])
+    loaded.load_history_from_json(cs, fn, add_to_history=True)
+    check_same_state(loaded, history)
+    assert np.isclose(loaded.compute_hypervolume(), history.compute_hypervolume())
+    loaded.save_json_incremental(fn)
+    loaded.compact(fn)
+    assert not os.path.exists(fn + '.log')
+    check_loaded(fn, 11)
+
+
+if __name__ == "__main__":
+    test_pareto_and_incumbents()
+    test_incremental_hypervolume()
+    test_add_batch()
+    test_save_and_load_json()